@@ -24,16 +24,16 @@ async def send_message(
 @router.get("/conversation/{conversation_id}", response_model=PaginatedMessageResponse)
 async def get_conversation_messages(
     conversation_id: int = Path(..., description="ID of the conversation"),
-    page: int = Query(1, description="Page number"),
+    paging_state: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
     limit: int = Query(20, description="Number of messages per page"),
     message_controller: MessageController = Depends()
 ) -> PaginatedMessageResponse:
     """
-    Get all messages in a conversation with pagination
+    Get all messages in a conversation with cursor-based pagination
     """
     return await message_controller.get_conversation_messages(
         conversation_id=conversation_id,
-        page=page,
+        paging_state=paging_state,
         limit=limit
     )
 
@@ -1,15 +1,34 @@
+import base64
+import binascii
 from typing import Optional
 from datetime import datetime
-from fastapi import HTTPException, status
+from fastapi import Depends, HTTPException, status
+from cassandra import InvalidRequest
+from cassandra.protocol import ProtocolException
 
 from app.schemas.message import MessageCreate, MessageResponse, PaginatedMessageResponse
-from app.models.cassandra_models import MessageModel
+from app.db.cassandra_client import CassandraClient, get_cassandra
+from app.models.cassandra_models import MessageModel, MessageRow
+
+def _to_message_response(msg: MessageRow) -> MessageResponse:
+    """Build a response item from a model row; rows are trusted, so skip validation."""
+    return MessageResponse.model_construct(
+        message_id=msg.message_id,
+        sender_id=msg.sender_id,
+        receiver_id=msg.receiver_id,
+        conversation_id=msg.conversation_id,
+        content=msg.content,
+        timestamp=msg.timestamp
+    )
 
 class MessageController:
     """
     Controller for handling message operations
     """
     
+    def __init__(self, cassandra: CassandraClient = Depends(get_cassandra)):
+        self.messages = MessageModel(cassandra)
+    
     async def send_message(self, message_data: MessageCreate) -> MessageResponse:
         """
         Send a message from one user to another
@@ -19,89 +38,66 @@ class MessageController:
             
         Returns:
             The created message with metadata
-        
-        Raises:
-            HTTPException: If message sending fails
         """
-        try:
-            sender_id = int(message_data.sender_id)
-            receiver_id = int(message_data.receiver_id)
-            
-            message = await MessageModel.create_message(
-                sender_id=sender_id,
-                receiver_id=receiver_id,
-                content=message_data.content
-            )
-            
-            return MessageResponse(
-                message_id=message["message_id"],  
-                sender_id=message["sender_id"],
-                receiver_id=message["receiver_id"],
-                conversation_id=message["conversation_id"],
-                content=message["content"],
-                timestamp=message["timestamp"]
-            )
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to send message: {str(e)}"
-            )
+        message = await self.messages.create_message(
+            sender_id=message_data.sender_id,
+            receiver_id=message_data.receiver_id,
+            content=message_data.content
+        )
+        
+        return _to_message_response(message)
     
     async def get_conversation_messages(
         self, 
         conversation_id: int, 
-        page: int = 1, 
+        paging_state: Optional[str] = None, 
         limit: int = 20
     ) -> PaginatedMessageResponse:
         """
-        Get all messages in a conversation with pagination
+        Get all messages in a conversation with cursor-based pagination
         
         Args:
             conversation_id: ID of the conversation
-            page: Page number
+            paging_state: Opaque cursor returned with the previous page
             limit: Number of messages per page
             
         Returns:
             Paginated list of messages
             
         Raises:
-            HTTPException: If conversation not found or access denied
+            HTTPException: If the cursor is invalid
         """
         try:
-            conversation_id = int(conversation_id)
-            
-            offset = (page - 1) * limit
-            
-            # Get messages
-            messages = await MessageModel.get_conversation_messages(
+            cursor = base64.b64decode(paging_state, altchars=b"-_", validate=True) if paging_state else None
+        except (binascii.Error, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid paging state"
+            )
+        
+        # Get messages
+        try:
+            messages, next_paging_state = await self.messages.get_conversation_messages(
                 conversation_id=conversation_id,
                 limit=limit,
-                offset=offset
+                paging_state=cursor
             )
-            
-            has_more = len(messages) == limit
-            
-            message_responses = [
-                MessageResponse(
-                    message_id=msg["message_id"],  
-                    sender_id=msg["sender_id"],
-                    receiver_id=msg["receiver_id"],
-                    conversation_id=msg["conversation_id"],
-                    content=msg["content"],
-                    timestamp=msg["timestamp"]
-                )
-                for msg in messages
-            ]
-            
-            return PaginatedMessageResponse(
-                messages=message_responses,
-                has_more=has_more
-            )
-        except Exception as e:
+        except (InvalidRequest, ProtocolException):
+            # Well-formed base64 can still decode to a paging state Cassandra rejects
+            if cursor is None:
+                raise
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to get messages: {str(e)}"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid paging state"
             )
+        
+        message_responses = list(map(_to_message_response, messages))
+        
+        return PaginatedMessageResponse(
+            messages=message_responses,
+            has_more=next_paging_state is not None,
+            next_cursor=base64.urlsafe_b64encode(next_paging_state).decode() if next_paging_state else None
+        )
     
     async def get_messages_before_timestamp(
         self, 
@@ -120,39 +116,16 @@ class MessageController:
             
         Returns:
             Paginated list of messages
-            
-        Raises:
-            HTTPException: If conversation not found or access denied
         """
-        try:
-            conversation_id = int(conversation_id)
-            
-            messages = await MessageModel.get_messages_before_timestamp(
-                conversation_id=conversation_id,
-                before_timestamp=before_timestamp,
-                limit=limit
-            )
-            
-            has_more = len(messages) == limit
-            
-            message_responses = [
-                MessageResponse(
-                    message_id=msg["message_id"], 
-                    sender_id=msg["sender_id"],
-                    receiver_id=msg["receiver_id"],
-                    conversation_id=msg["conversation_id"],
-                    content=msg["content"],
-                    timestamp=msg["timestamp"]
-                )
-                for msg in messages
-            ]
-            
-            return PaginatedMessageResponse(
-                messages=message_responses,
-                has_more=has_more
-            )
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to get messages: {str(e)}"
-            )
\ No newline at end of file
+        messages, has_more = await self.messages.get_messages_before_timestamp(
+            conversation_id=conversation_id,
+            before_timestamp=before_timestamp,
+            limit=limit
+        )
+        
+        message_responses = list(map(_to_message_response, messages))
+        
+        return PaginatedMessageResponse(
+            messages=message_responses,
+            has_more=has_more
+        )
\ No newline at end of file
@@ -5,46 +5,71 @@ This provides a connection to the Cassandra database.
 import os
 import uuid
 import time
-from typing import List, Dict, Any, Optional
+import asyncio
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from datetime import datetime
 import logging
 
-from cassandra.cluster import Cluster, Session, NoHostAvailable
+from fastapi import Request
+from cassandra.cluster import Cluster, Session, ExecutionProfile, EXEC_PROFILE_DEFAULT
+from cassandra.policies import TokenAwarePolicy, DCAwareRoundRobinPolicy
 from cassandra.auth import PlainTextAuthProvider
-from cassandra.query import SimpleStatement, dict_factory
+from cassandra.query import PreparedStatement, named_tuple_factory
 
 logger = logging.getLogger(__name__)
 
+PROTOCOL_VERSION = 4
+REQUEST_TIMEOUT = 10
+
+def default_execution_profile() -> ExecutionProfile:
+    """
+    Build the default execution profile: route each query straight to a replica
+    owning its partition key, preferring the local datacenter.
+    """
+    return ExecutionProfile(
+        load_balancing_policy=TokenAwarePolicy(DCAwareRoundRobinPolicy()),
+        row_factory=named_tuple_factory,
+        request_timeout=REQUEST_TIMEOUT
+    )
+
 class CassandraClient:
-    """Singleton Cassandra client for the application."""
+    """
+    Cassandra client for the application.
     
-    _instance = None
+    One instance is created per worker at startup and stored on app.state;
+    request handlers receive it through the get_cassandra dependency.
+    """
     
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(CassandraClient, cls).__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
-    
-    def __init__(self):
-        """Initialize the Cassandra connection."""
-        if self._initialized:
-            return
-        
+    def __init__(self, executor_threads: Optional[int] = None):
+        """Initialize the Cassandra connection settings."""
         self.host = os.getenv("CASSANDRA_HOST", "localhost")
         self.port = int(os.getenv("CASSANDRA_PORT", "9042"))
         self.keyspace = os.getenv("CASSANDRA_KEYSPACE", "messenger")
+        self.executor_threads = executor_threads or int(os.getenv("CASSANDRA_EXECUTOR_THREADS", "8"))
         
         self.cluster = None
         self.session = None
-        
-        self._initialized = True
+        self._prepared: Dict[str, PreparedStatement] = {}
     
-    def connect(self, retries: int = 30, delay: int = 5) -> None:
-        """Connect to the Cassandra cluster with retry logic."""
+    def connect(self, retries: int = 30, delay: int = 5, statements: Iterable[str] = ()) -> None:
+        """
+        Connect to the Cassandra cluster with retry logic.
+        
+        Args:
+            retries: Number of connection attempts
+            delay: Seconds to wait between attempts
+            statements: CQL queries to prepare once connected; see prepare_all()
+        """
         for attempt in range(1, retries + 1):
             try:
-                self.cluster = Cluster([self.host])
+                self.cluster = Cluster(
+                    [self.host],
+                    port=self.port,
+                    protocol_version=PROTOCOL_VERSION,
+                    compression=True,
+                    executor_threads=self.executor_threads,
+                    execution_profiles={EXEC_PROFILE_DEFAULT: default_execution_profile()}
+                )
                 temp_session = self.cluster.connect()
                 
                 keyspaces = [row.keyspace_name for row in temp_session.execute("SELECT keyspace_name FROM system_schema.keyspaces")]
@@ -57,25 +82,66 @@ class CassandraClient:
                     temp_session.execute(query)
                 
                 self.session = self.cluster.connect(self.keyspace)
-                self.session.row_factory = dict_factory
                 logger.info(f"Connected to Cassandra at {self.host}:{self.port}, keyspace: {self.keyspace}")
-                return
-            except NoHostAvailable as e:
-                logger.warning(f"[Attempt {attempt}] No Cassandra host available: {str(e)}")
-                if attempt < retries:
-                    logger.info(f"Retrying in {delay} seconds...")
-                    time.sleep(delay)
-                else:
-                    logger.error("Exceeded max retries. Cassandra is not available.")
-                    raise
+                break
             except Exception as e:
                 logger.warning(f"[Attempt {attempt}] Failed to connect to Cassandra: {str(e)}")
+                # Cluster() itself may have raised, leaving nothing to shut down
+                if self.cluster is not None:
+                    self.cluster.shutdown()
+                    self.cluster = None
                 if attempt < retries:
                     logger.info(f"Retrying in {delay} seconds...")
                     time.sleep(delay)
                 else:
                     logger.error("Exceeded max retries. Cassandra is not available.")
                     raise
+        
+        self.prepare_all(statements)
+    
+    def prepare_all(self, statements: Iterable[str]) -> None:
+        """
+        Prepare statements up front so request handlers don't block on a
+        first-use prepare.
+        
+        Failures are not fatal: the tables may not exist until
+        scripts/setup_db.py has run, and any statement left unprepared here
+        is prepared on first use instead.
+        """
+        statements = tuple(statements)
+        failures = 0
+        last_error = None
+        for query in statements:
+            try:
+                self.prepare(query)
+            except Exception as e:
+                failures += 1
+                last_error = e
+        
+        if failures:
+            logger.warning(
+                f"{failures} of {len(statements)} statements could not be prepared at startup "
+                f"({str(last_error)}); they will be prepared on first use. "
+                "Run scripts/setup_db.py if the schema has not been created yet."
+            )
+    
+    def prepare(self, query: str) -> PreparedStatement:
+        """
+        Get a prepared statement for a CQL query, preparing it on first use.
+        
+        Queries prepared by prepare_all() are already cached; anything else
+        pays a blocking prepare round trip the first time it is used.
+        
+        Args:
+            query: The CQL query string, using ? placeholders
+            
+        Returns:
+            The cached prepared statement
+        """
+        statement = self._prepared.get(query)
+        if statement is None:
+            statement = self._prepared[query] = self.session.prepare(query)
+        return statement
     
     def close(self) -> None:
         """Close the Cassandra connection."""
@@ -83,53 +149,130 @@ class CassandraClient:
             self.cluster.shutdown()
             logger.info("Cassandra connection closed")
     
-    def execute(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
+    def execute(self, query: str, params: tuple = None) -> List[Tuple]:
         """
         Execute a CQL query.
         
         Args:
-            query: The CQL query string
+            query: The CQL query string, using ? placeholders
             params: The parameters for the query
             
         Returns:
-            List of rows as dictionaries
+            List of rows as named tuples
         """
-        if not self.session:
-            self.connect()
-        
         try:
-            statement = SimpleStatement(query)
+            statement = self.prepare(query)
             result = self.session.execute(statement, params or ())
             return list(result)
         except Exception as e:
             logger.error(f"Query execution failed: {str(e)}")
             raise
     
-    def execute_async(self, query: str, params: tuple = None):
+    def execute_async(
+        self, 
+        query: str, 
+        params: tuple = None, 
+        fetch_size: Optional[int] = None, 
+        paging_state: Optional[bytes] = None
+    ):
         """
         Execute a CQL query asynchronously.
         
         Args:
-            query: The CQL query string
+            query: The CQL query string, using ? placeholders
             params: The parameters for the query
+            fetch_size: Optional page size for driver-side paging
+            paging_state: Optional paging state to resume from
             
         Returns:
             Async result object
         """
-        if not self.session:
-            self.connect()
-        
         try:
-            statement = SimpleStatement(query)
-            return self.session.execute_async(statement, params or ())
+            statement = self.prepare(query).bind(params or ())
+            if fetch_size is not None:
+                statement.fetch_size = fetch_size
+            return self.session.execute_async(statement, paging_state=paging_state)
         except Exception as e:
             logger.error(f"Async query execution failed: {str(e)}")
             raise
     
+    async def execute_async_await(self, query: str, params: tuple = None) -> List[Tuple]:
+        """
+        Execute a CQL query without blocking the event loop.
+        
+        Args:
+            query: The CQL query string, using ? placeholders
+            params: The parameters for the query
+            
+        Returns:
+            List of rows as named tuples
+        """
+        rows, _ = await self._await_response(self.execute_async(query, params))
+        return rows
+    
+    async def execute_page(
+        self, 
+        query: str, 
+        params: tuple = None, 
+        fetch_size: int = 20, 
+        paging_state: Optional[bytes] = None
+    ) -> Tuple[List[Tuple], Optional[bytes]]:
+        """
+        Fetch a single page of a CQL query without blocking the event loop.
+        
+        Args:
+            query: The CQL query string, using ? placeholders
+            params: The parameters for the query
+            fetch_size: Number of rows in the page
+            paging_state: Paging state returned by a previous page, if any
+            
+        Returns:
+            Tuple of (rows, paging_state for the next page or None)
+        """
+        return await self._await_response(
+            self.execute_async(query, params, fetch_size=fetch_size, paging_state=paging_state)
+        )
+    
+    async def _await_response(self, response_future) -> Tuple[List[Tuple], Optional[bytes]]:
+        """
+        Bridge a driver ResponseFuture onto the running event loop.
+        
+        The driver invokes callbacks on its I/O thread, so the result is handed
+        back to the loop via call_soon_threadsafe. Only the current page is
+        materialized; the paging state is returned alongside it.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        def on_success(rows):
+            # Writes and DDL complete with a VOID result, delivered as rows=None.
+            # _paging_state is what ResultSet.paging_state reads (cassandra-driver 3.30.x).
+            result = (list(rows) if rows is not None else [], response_future._paging_state)
+            loop.call_soon_threadsafe(_set_result, future, result)
+        
+        def on_error(exc):
+            loop.call_soon_threadsafe(_set_exception, future, exc)
+        
+        response_future.add_callbacks(on_success, on_error)
+        
+        try:
+            return await future
+        except Exception as e:
+            logger.error(f"Query execution failed: {str(e)}")
+            raise
+    
     def get_session(self) -> Session:
-        """Get the Cassandra session."""
-        if not self.session:
-            self.connect()
+        """Get the Cassandra session. connect() must have been called first."""
         return self.session
 
-cassandra_client = CassandraClient()
\ No newline at end of file
+def _set_result(future: asyncio.Future, result: Any) -> None:
+    if not future.done():
+        future.set_result(result)
+
+def _set_exception(future: asyncio.Future, exc: BaseException) -> None:
+    if not future.done():
+        future.set_exception(exc)
+
+def get_cassandra(request: Request) -> CassandraClient:
+    """Dependency returning the worker's Cassandra client."""
+    return request.app.state.cassandra
\ No newline at end of file
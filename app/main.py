@@ -1,13 +1,12 @@
 import logging
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-import sys
 import os
 
 from app.api.routes import message_router, conversation_router
-from app.controllers.message_controller import MessageController
-from app.controllers.conversation_controller import ConversationController
-from app.db.cassandra_client import cassandra_client
+from app.db.cassandra_client import CassandraClient
+from app.models.cassandra_models import PREPARED_STATEMENTS
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,7 +17,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="FB Messenger API",
     description="Backend API for FB Messenger implementation using Cassandra",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -29,16 +29,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def get_message_controller():
-    """Dependency for message controller."""
-    return MessageController()
-
-def get_conversation_controller():
-    """Dependency for conversation controller."""
-    return ConversationController()
-
-app.dependency_overrides[MessageController] = get_message_controller
-app.dependency_overrides[ConversationController] = get_conversation_controller
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception) -> ORJSONResponse:
+    """Log unexpected errors and return a generic 500 without leaking details."""
+    logger.error(f"Unhandled error during {request.method} {request.url.path}", exc_info=exc)
+    return ORJSONResponse(
+        status_code=500,
+        content={"detail": "Internal server error"}
+    )
 
 app.include_router(message_router)
 app.include_router(conversation_router)
@@ -52,17 +50,21 @@ async def startup_event():
     """Initialize services on startup."""
     logger.info("Initializing application...")
     try:
-        cassandra_client.get_session()
+        app.state.cassandra = CassandraClient()
+        app.state.cassandra.connect(statements=PREPARED_STATEMENTS)
         logger.info("Cassandra connection established")
     except Exception as e:
+        # Let the server report the failed startup rather than exiting the worker
         logger.error(f"Failed to connect to Cassandra: {str(e)}")
-        sys.exit(1)
+        raise
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up resources on shutdown."""
     logger.info("Shutting down application...")
-    cassandra_client.close()
+    cassandra = getattr(app.state, "cassandra", None)
+    if cassandra is not None:
+        cassandra.close()
 
 if __name__ == "__main__":
     import uvicorn
@@ -3,23 +3,141 @@ Cassandra models for the Messenger application.
 """
 
 import uuid
-import time
+import struct
+import asyncio
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple, Union
-from app.db.cassandra_client import cassandra_client
+from typing import List, Optional, Tuple
+from cachetools import TTLCache
+from cassandra.murmur3 import murmur3
+from app.db.cassandra_client import CassandraClient
+
+def conversation_id_for(user1_id: int, user2_id: int) -> int:
+    """
+    Derive the conversation ID for a pair of users.
+    
+    The ID is the Murmur3 hash of the ordered pair, masked to a non-negative
+    bigint, so finding a pair's conversation needs no lookup table.
+    """
+    user1_id, user2_id = sorted((user1_id, user2_id))
+    return murmur3(struct.pack(">qq", user1_id, user2_id)) & 0x7FFFFFFFFFFFFFFF
+
+# conversation_id -> True for conversations known to exist; they are never deleted
+_known_conversation_ids: TTLCache = TTLCache(maxsize=100_000, ttl=3600)
+
+# conversation_id -> ConversationRow; short-lived since last_updated moves on every message
+_conversation_cache: TTLCache = TTLCache(maxsize=50_000, ttl=5)
+
+INSERT_MESSAGE = """
+    INSERT INTO messages_by_conversation (
+        conversation_id, created_at, message_id, sender_id, receiver_id, content
+    ) VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+UPSERT_USER_CONVERSATION = """
+    INSERT INTO conversations_by_user (
+        user_id, last_message_at, conversation_id, other_user_id, last_message_content
+    ) VALUES (?, ?, ?, ?, ?)
+"""
+
+SELECT_CONVERSATION_MESSAGES = """
+    SELECT * FROM messages_by_conversation
+    WHERE conversation_id = ?
+"""
+
+SELECT_MESSAGES_BEFORE_TIMESTAMP = """
+    SELECT * FROM messages_by_conversation
+    WHERE conversation_id = ? AND created_at < ?
+"""
+
+SELECT_USER_CONVERSATIONS = """
+    SELECT * FROM conversations_by_user
+    WHERE user_id = ?
+"""
+
+SELECT_CONVERSATION_METADATA = """
+    SELECT * FROM conversation_metadata
+    WHERE conversation_id = ?
+"""
+
+# Messages are clustered by created_at DESC, so this reads the head of one partition
+SELECT_CONVERSATION_LAST_MESSAGE_AT = """
+    SELECT created_at FROM messages_by_conversation
+    WHERE conversation_id = ?
+    LIMIT 1
+"""
+
+SELECT_CONVERSATION_ID = """
+    SELECT conversation_id FROM conversation_metadata
+    WHERE conversation_id = ?
+"""
+
+# Conditional so concurrent first messages can't overwrite each other's created_at
+INSERT_CONVERSATION_METADATA = """
+    INSERT INTO conversation_metadata (
+        conversation_id, user1_id, user2_id, created_at
+    ) VALUES (?, ?, ?, ?)
+    IF NOT EXISTS
+"""
+
+# Prepared by CassandraClient.connect() at startup
+PREPARED_STATEMENTS = (
+    INSERT_MESSAGE,
+    UPSERT_USER_CONVERSATION,
+    SELECT_CONVERSATION_MESSAGES,
+    SELECT_MESSAGES_BEFORE_TIMESTAMP,
+    SELECT_USER_CONVERSATIONS,
+    SELECT_CONVERSATION_METADATA,
+    SELECT_CONVERSATION_LAST_MESSAGE_AT,
+    SELECT_CONVERSATION_ID,
+    INSERT_CONVERSATION_METADATA,
+)
+
+
+@dataclass(slots=True)
+class MessageRow:
+    """A message as returned by MessageModel."""
+    message_id: uuid.UUID
+    conversation_id: int
+    sender_id: int
+    receiver_id: int
+    content: str
+    timestamp: datetime
+
+
+@dataclass(slots=True)
+class ConversationListRow:
+    """A conversation as listed for one of its participants."""
+    conversation_id: int
+    other_user_id: int
+    last_updated: datetime
+    last_message: str
+
+
+@dataclass(slots=True)
+class ConversationRow:
+    """Conversation details as returned by ConversationModel."""
+    conversation_id: int
+    participant_ids: List[int]
+    created_at: datetime
+    last_updated: datetime
+
 
 class MessageModel:
     """
     Message model for interacting with the messages table.
     """
     
-    @staticmethod
+    def __init__(self, cassandra: CassandraClient):
+        self.cassandra = cassandra
+    
     async def create_message(
+        self,
         sender_id: int, 
         receiver_id: int, 
         content: str, 
         conversation_id: Optional[int] = None
-    ) -> Dict[str, Any]:
+    ) -> MessageRow:
         """
         Create a new message in a conversation.
         
@@ -33,109 +151,86 @@ class MessageModel:
             conversation_id: Optional ID of the conversation
             
         Returns:
-            Dict containing the created message data
+            The created message
         """
         timestamp = datetime.utcnow()
         
         message_id = uuid.uuid4()
         
-        sender_id = int(sender_id)
-        receiver_id = int(receiver_id)
-        
         if conversation_id is None:
-            conversation_id = await ConversationModel.create_or_get_conversation(
+            conversation_id = await ConversationModel(self.cassandra).get_or_create_conversation_id(
                 user1_id=sender_id,
                 user2_id=receiver_id
             )
         
-        conversation_id = int(conversation_id)
-        
-        query = """
-            INSERT INTO messages_by_conversation (
-                conversation_id, created_at, message_id, sender_id, receiver_id, content
-            ) VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        cassandra_client.execute(query, (
-            conversation_id, timestamp, message_id, sender_id, receiver_id, content
-        ))
-        
-        update_query = """
-            INSERT INTO conversations_by_user (
-                user_id, last_message_at, conversation_id, other_user_id, last_message_content
-            ) VALUES (%s, %s, %s, %s, %s)
-        """
-        cassandra_client.execute(update_query, (
-            sender_id, timestamp, conversation_id, receiver_id, content
-        ))
-        cassandra_client.execute(update_query, (
-            receiver_id, timestamp, conversation_id, sender_id, content
-        ))
-        
-        metadata_query = """
-            UPDATE conversation_metadata SET 
-                last_message_at = %s, 
-                last_message_content = %s
-            WHERE conversation_id = %s
-        """
-        cassandra_client.execute(metadata_query, (
-            timestamp, content, conversation_id
-        ))
-        
-        return {
-            "message_id": str(message_id),
-            "conversation_id": conversation_id,
-            "sender_id": sender_id,
-            "receiver_id": receiver_id,
-            "content": content,
-            "timestamp": timestamp.isoformat()
-        }
+        # The writes touch independent partitions, so issue them concurrently
+        await asyncio.gather(
+            self.cassandra.execute_async_await(INSERT_MESSAGE, (
+                conversation_id, timestamp, message_id, sender_id, receiver_id, content
+            )),
+            self.cassandra.execute_async_await(UPSERT_USER_CONVERSATION, (
+                sender_id, timestamp, conversation_id, receiver_id, content
+            )),
+            self.cassandra.execute_async_await(UPSERT_USER_CONVERSATION, (
+                receiver_id, timestamp, conversation_id, sender_id, content
+            ))
+        )
+        
+        _conversation_cache.pop(conversation_id, None)
+        
+        return MessageRow(
+            message_id=message_id,
+            conversation_id=conversation_id,
+            sender_id=sender_id,
+            receiver_id=receiver_id,
+            content=content,
+            timestamp=timestamp
+        )
 
-    @staticmethod
     async def get_conversation_messages(
-        conversation_id: Union[int, str], 
+        self,
+        conversation_id: int, 
         limit: int = 20, 
-        offset: int = 0
-    ) -> List[Dict[str, Any]]:
+        paging_state: Optional[bytes] = None
+    ) -> Tuple[List[MessageRow], Optional[bytes]]:
         """
-        Get messages for a conversation with pagination.
+        Get a page of messages for a conversation.
         
         Args:
             conversation_id: ID of the conversation
             limit: Maximum number of messages to return
-            offset: Number of messages to skip
+            paging_state: Paging state returned with the previous page, if any
             
         Returns:
-            List of message dictionaries
+            Tuple of (messages, paging_state for the next page or None)
         """
-        conversation_id = int(conversation_id)
-        
-        query = """
-            SELECT * FROM messages_by_conversation
-            WHERE conversation_id = %s
-            LIMIT %s
-        """
-        rows = cassandra_client.execute(query, (conversation_id, limit + offset))
-        
-        messages = list(rows)[offset:] if offset > 0 else list(rows)
-        
-        return [
-            {
-                "message_id": str(row["message_id"]),
-                "conversation_id": row["conversation_id"],
-                "sender_id": row["sender_id"],
-                "receiver_id": row["receiver_id"],
-                "content": row["content"],
-                "timestamp": row["created_at"].isoformat()
-            }
-            for row in messages
+        rows, next_paging_state = await self.cassandra.execute_page(
+            SELECT_CONVERSATION_MESSAGES,
+            (conversation_id,),
+            fetch_size=limit,
+            paging_state=paging_state
+        )
+        
+        messages = [
+            MessageRow(
+                message_id=row.message_id,
+                conversation_id=row.conversation_id,
+                sender_id=row.sender_id,
+                receiver_id=row.receiver_id,
+                content=row.content,
+                timestamp=row.created_at
+            )
+            for row in rows
         ]
+        
+        return messages, next_paging_state
     
-    @staticmethod
     async def get_messages_before_timestamp(
-        conversation_id: Union[int, str], 
+        self,
+        conversation_id: int, 
         before_timestamp: datetime, 
         limit: int = 20
-    ) -> List[Dict[str, Any]]:
+    ) -> Tuple[List[MessageRow], bool]:
         """
         Get messages before a timestamp with pagination.
         
@@ -145,28 +240,29 @@ class MessageModel:
             limit: Maximum number of messages to return
             
         Returns:
-            List of message dictionaries
+            Tuple of (messages, has_more)
         """
-        conversation_id = int(conversation_id)
-        
-        query = """
-            SELECT * FROM messages_by_conversation
-            WHERE conversation_id = %s AND created_at < %s
-            LIMIT %s
-        """
-        rows = cassandra_client.execute(query, (conversation_id, before_timestamp, limit))
-        
-        return [
-            {
-                "message_id": str(row["message_id"]),
-                "conversation_id": row["conversation_id"],
-                "sender_id": row["sender_id"],
-                "receiver_id": row["receiver_id"],
-                "content": row["content"],
-                "timestamp": row["created_at"].isoformat()
-            }
-            for row in rows
+        # One extra row tells whether another page exists; a paging state alone
+        # is also returned when the page fills exactly
+        rows, _ = await self.cassandra.execute_page(
+            SELECT_MESSAGES_BEFORE_TIMESTAMP,
+            (conversation_id, before_timestamp),
+            fetch_size=limit + 1
+        )
+        
+        messages = [
+            MessageRow(
+                message_id=row.message_id,
+                conversation_id=row.conversation_id,
+                sender_id=row.sender_id,
+                receiver_id=row.receiver_id,
+                content=row.content,
+                timestamp=row.created_at
+            )
+            for row in rows[:limit]
         ]
+        
+        return messages, len(rows) > limit
 
 
 class ConversationModel:
@@ -174,11 +270,14 @@ class ConversationModel:
     Conversation model for interacting with the conversations-related tables.
     """
     
-    @staticmethod
+    def __init__(self, cassandra: CassandraClient):
+        self.cassandra = cassandra
+    
     async def get_user_conversations(
+        self,
         user_id: int, 
         limit: int = 20
-    ) -> Tuple[List[Dict[str, Any]], bool]:
+    ) -> Tuple[List[ConversationListRow], bool]:
         """
         Get conversations for a user with pagination.
         
@@ -189,33 +288,29 @@ class ConversationModel:
         Returns:
             Tuple of (conversations, has_more)
         """
-        user_id = int(user_id)
-        
-        query = """
-            SELECT * FROM conversations_by_user
-            WHERE user_id = %s
-            LIMIT %s
-        """
-        rows = cassandra_client.execute(query, (user_id, limit))
+        # Fetch one extra row to learn whether another page exists
+        rows, _ = await self.cassandra.execute_page(
+            SELECT_USER_CONVERSATIONS,
+            (user_id,),
+            fetch_size=limit + 1
+        )
         
         conversations = [
-            {
-                "conversation_id": row["conversation_id"],
-                "other_user_id": row["other_user_id"],
-                "last_updated": row["last_message_at"].isoformat(),
-                "last_message": row["last_message_content"]
-            }
-            for row in rows
+            ConversationListRow(
+                conversation_id=row.conversation_id,
+                other_user_id=row.other_user_id,
+                last_updated=row.last_message_at,
+                last_message=row.last_message_content
+            )
+            for row in rows[:limit]
         ]
         
-        has_more = len(conversations) == limit
-        
-        return conversations, has_more
+        return conversations, len(rows) > limit
     
-    @staticmethod
     async def get_conversation(
-        conversation_id: Union[int, str]
-    ) -> Optional[Dict[str, Any]]:
+        self,
+        conversation_id: int
+    ) -> Optional[ConversationRow]:
         """
         Get a conversation by ID.
         
@@ -223,76 +318,107 @@ class ConversationModel:
             conversation_id: ID of the conversation
             
         Returns:
-            Conversation details dictionary
+            Conversation details
         """
-        conversation_id = int(conversation_id)
+        conversation = _conversation_cache.get(conversation_id)
+        if conversation is not None:
+            return conversation
         
-        query = """
-            SELECT * FROM conversation_metadata
-            WHERE conversation_id = %s
-        """
-        rows = cassandra_client.execute(query, (conversation_id,))
+        # The last message time is the newest message's; both reads key on conversation_id
+        rows, last_rows = await asyncio.gather(
+            self.cassandra.execute_async_await(SELECT_CONVERSATION_METADATA, (conversation_id,)),
+            self.cassandra.execute_async_await(SELECT_CONVERSATION_LAST_MESSAGE_AT, (conversation_id,))
+        )
         
         if not rows:
             return None
         
         row = rows[0]
-        return {
-            "conversation_id": row["conversation_id"],
-            "participant_ids": [row["user1_id"], row["user2_id"]],
-            "created_at": row["created_at"].isoformat(),
-            "last_updated": row["last_message_at"].isoformat() if row["last_message_at"] else row["created_at"].isoformat()
-        }
+        
+        conversation = ConversationRow(
+            conversation_id=row.conversation_id,
+            participant_ids=[row.user1_id, row.user2_id],
+            created_at=row.created_at,
+            last_updated=last_rows[0].created_at if last_rows else row.created_at
+        )
+        _conversation_cache[conversation_id] = conversation
+        return conversation
     
-    @staticmethod
     async def create_or_get_conversation(
+        self,
         user1_id: int, 
         user2_id: int
-    ) -> int:
+    ) -> Optional[ConversationRow]:
         """
         Get an existing conversation between two users or create a new one.
         
         This ensures we don't create duplicate conversations between the same users.
+        A newly created conversation is built from the values just written, so
+        no read-back is needed.
         
         Args:
             user1_id: ID of the first user
             user2_id: ID of the second user
             
         Returns:
-            Conversation ID as integer
+            Conversation details
         """
-        user1_id = int(user1_id)
-        user2_id = int(user2_id)
+        conversation_id = conversation_id_for(user1_id, user2_id)
         
-        if user1_id > user2_id:
-            user1_id, user2_id = user2_id, user1_id
+        conversation = await self.get_conversation(conversation_id=conversation_id)
+        if conversation is None:
+            conversation = await self._create_conversation(conversation_id, user1_id, user2_id)
         
-        lookup_query = """
-            SELECT conversation_id FROM user_conversations_lookup
-            WHERE user1_id = %s AND user2_id = %s
+        return conversation
+    
+    async def get_or_create_conversation_id(
+        self,
+        user1_id: int, 
+        user2_id: int
+    ) -> int:
         """
-        rows = cassandra_client.execute(lookup_query, (user1_id, user2_id))
+        Get the ID of the conversation between two users, creating it if needed.
         
-        if rows:
-            return rows[0]["conversation_id"]
+        Args:
+            user1_id: ID of the first user
+            user2_id: ID of the second user
+            
+        Returns:
+            Conversation ID as integer
+        """
+        conversation_id = conversation_id_for(user1_id, user2_id)
+        if conversation_id in _known_conversation_ids:
+            return conversation_id
         
-        timestamp = datetime.utcnow()
-      
-        conversation_id = int(time.time() * 1000) + (user1_id * 1000) + (user2_id % 1000)
+        rows = await self.cassandra.execute_async_await(SELECT_CONVERSATION_ID, (conversation_id,))
+        if rows:
+            _known_conversation_ids[conversation_id] = True
+        else:
+            await self._create_conversation(conversation_id, user1_id, user2_id)
         
-        insert_lookup = """
-            INSERT INTO user_conversations_lookup (user1_id, user2_id, conversation_id)
-            VALUES (%s, %s, %s)
+        return conversation_id
+    
+    async def _create_conversation(self, conversation_id: int, user1_id: int, user2_id: int) -> ConversationRow:
         """
-        cassandra_client.execute(insert_lookup, (user1_id, user2_id, conversation_id))
+        Create the conversation with the given ID for a user pair.
         
-        insert_metadata = """
-            INSERT INTO conversation_metadata (
-                conversation_id, user1_id, user2_id, created_at, last_message_at
-            ) VALUES (%s, %s, %s, %s, NULL)
+        If a concurrent request created it first, that request's row is kept
+        and returned.
         """
-        cassandra_client.execute(insert_metadata, (
+        user1_id, user2_id = sorted((user1_id, user2_id))
+        timestamp = datetime.utcnow()
+        
+        rows = await self.cassandra.execute_async_await(INSERT_CONVERSATION_METADATA, (
             conversation_id, user1_id, user2_id, timestamp
         ))
+        if rows and not rows[0].applied:
+            timestamp = rows[0].created_at
+        
+        _known_conversation_ids[conversation_id] = True
         
-        return conversation_id
\ No newline at end of file
+        return ConversationRow(
+            conversation_id=conversation_id,
+            participant_ids=[user1_id, user2_id],
+            created_at=timestamp,
+            last_updated=timestamp
+        )
@@ -0,0 +1,2 @@
+# User IDs are stored as CQL int
+MAX_USER_ID = 2**31 - 1
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
+from datetime import datetime
 
 class ConversationBase(BaseModel):
     """Base conversation model with common attributes"""
@@ -13,16 +14,16 @@ class ConversationResponse(ConversationBase):
     """Schema for conversation response"""
     conversation_id: int = Field(..., description="Unique identifier for the conversation")
     participant_ids: List[int] = Field(..., description="IDs of conversation participants")
-    created_at: str = Field(..., description="Timestamp of conversation creation")
-    last_updated: str = Field(..., description="Timestamp of last message")
+    created_at: datetime = Field(..., description="Timestamp of conversation creation")
+    last_updated: datetime = Field(..., description="Timestamp of last message")
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 class ConversationListItem(BaseModel):
     """Schema for conversation list item"""
     conversation_id: int = Field(..., description="Unique identifier for the conversation")
     other_user_id: int = Field(..., description="ID of the other user in 1-1 conversations")
-    last_updated: str = Field(..., description="Timestamp of last message")
+    last_updated: datetime = Field(..., description="Timestamp of last message")
     last_message: str = Field(..., description="Preview of the last message")
 
 class PaginatedConversationResponse(BaseModel):
@@ -1,6 +1,9 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
+from uuid import UUID
+
+from app.schemas.common import MAX_USER_ID
 
 class MessageBase(BaseModel):
     """Base message model with common attributes"""
@@ -8,21 +11,22 @@ class MessageBase(BaseModel):
 
 class MessageCreate(MessageBase):
     """Schema for creating a new message"""
-    sender_id: int = Field(..., description="ID of the sender")
-    receiver_id: int = Field(..., description="ID of the receiver")
+    sender_id: int = Field(..., ge=0, le=MAX_USER_ID, description="ID of the sender")
+    receiver_id: int = Field(..., ge=0, le=MAX_USER_ID, description="ID of the receiver")
 
 class MessageResponse(MessageBase):
     """Schema for message response"""
-    message_id: str = Field(..., description="Unique identifier for the message")
+    message_id: UUID = Field(..., description="Unique identifier for the message")
     sender_id: int = Field(..., description="ID of the sender")
     receiver_id: int = Field(..., description="ID of the receiver")
     conversation_id: int = Field(..., description="ID of the conversation")
-    timestamp: str = Field(..., description="Timestamp of message creation")
+    timestamp: datetime = Field(..., description="Timestamp of message creation")
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 class PaginatedMessageResponse(BaseModel):
     """Schema for paginated message responses"""
     messages: List[MessageResponse] = Field(default_factory=list, description="List of messages")
-    has_more: bool = Field(default=False, description="Whether there are more messages to fetch")
\ No newline at end of file
+    has_more: bool = Field(default=False, description="Whether there are more messages to fetch")
+    next_cursor: Optional[str] = Field(default=None, description="Opaque cursor for fetching the next page")
\ No newline at end of file
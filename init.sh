@@ -25,14 +25,13 @@ docker compose up -d
 echo "Waiting for Cassandra to initialize (this may take a minute or two)..."
 docker compose exec -T cassandra bash -c "for i in {1..30}; do if cqlsh -e 'describe cluster' &>/dev/null; then echo 'Cassandra ready!'; exit 0; fi; echo 'Waiting for Cassandra...'; sleep 5; done; echo 'Cassandra did not start in time'; exit 1"
 
-# Inform about setup needed
+# Create the keyspace and tables. The app is already running; statements it
+# could not prepare at startup are prepared on first use once these exist.
+echo "Creating keyspace and tables..."
+docker compose exec -T app python scripts/setup_db.py
+
 echo "====================================================================="
-echo "IMPORTANT: You need to implement the database schema yourself!"
-echo "1. You should design and implement the keyspace and tables in the"
-echo "   scripts/setup_db.py file according to your data model design."
-echo "2. After implementing, run: docker-compose exec app python scripts/setup_db.py"
-echo "3. You'll also need to implement the test data generation in"
-echo "   scripts/generate_test_data.py for testing purposes."
+echo "To load test data, run: docker-compose exec app python scripts/generate_test_data.py"
 echo "====================================================================="
 
 echo "The FastAPI application is running at http://localhost:8000"
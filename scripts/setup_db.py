@@ -2,10 +2,24 @@
 Script to initialize Cassandra keyspace and tables for the Messenger application.
 """
 import os
+import re
+import asyncio
 import time
+import random
+import atexit
 import logging
-from cassandra.cluster import Cluster
+import threading
+from cassandra import AuthenticationFailed
+from cassandra.cluster import Cluster, ExecutionProfile, EXEC_PROFILE_DEFAULT, NoHostAvailable
 from cassandra.auth import PlainTextAuthProvider
+from cassandra.policies import RetryPolicy, TokenAwarePolicy, DCAwareRoundRobinPolicy, ExponentialReconnectionPolicy
+from cassandra.query import SimpleStatement
+
+# Event-driven reactors; never fall back to the select()-based asyncore loop
+try:
+    from cassandra.io.libevreactor import LibevConnection as ConnectionClass
+except ImportError:
+    from cassandra.io.asyncioreactor import AsyncioConnection as ConnectionClass
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -13,113 +27,332 @@ logger = logging.getLogger(__name__)
 CASSANDRA_HOST = os.getenv("CASSANDRA_HOST", "localhost")
 CASSANDRA_PORT = int(os.getenv("CASSANDRA_PORT", "9042"))
 CASSANDRA_KEYSPACE = os.getenv("CASSANDRA_KEYSPACE", "messenger")
+CASSANDRA_REPLICATION_FACTOR = os.getenv("CASSANDRA_REPLICATION_FACTOR")
 
-def wait_for_cassandra():
-    """Wait for Cassandra to be ready before proceeding."""
+MAX_REPLICATION_FACTOR = 3
+
+# Unquoted CQL identifier; anything else is rejected rather than interpolated into DDL
+KEYSPACE_NAME_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9_]{0,47}")
+if not KEYSPACE_NAME_PATTERN.fullmatch(CASSANDRA_KEYSPACE):
+    raise ValueError(f"Invalid CASSANDRA_KEYSPACE: {CASSANDRA_KEYSPACE!r}")
+# Cassandra folds unquoted identifiers to lowercase, and system_schema stores them that way
+CASSANDRA_KEYSPACE = CASSANDRA_KEYSPACE.lower()
+
+# Built once; only the replication factor (%d) varies between runs
+CREATE_KEYSPACE_CQL = f"""
+    CREATE KEYSPACE IF NOT EXISTS {CASSANDRA_KEYSPACE}
+    WITH REPLICATION = {{
+        'class': 'SimpleStrategy',
+        'replication_factor': %d
+    }}
+    """
+
+CONNECT_DEADLINE = 120  # seconds
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 30
+BACKOFF_JITTER = 0.5
+
+PROTOCOL_VERSION = 4
+CONNECT_TIMEOUT = 2  # seconds; fail unreachable attempts fast so more retries fit the deadline
+DDL_REQUEST_TIMEOUT = 30  # seconds
+SCHEMA_AGREEMENT_WAIT = 30  # seconds; agreement is awaited explicitly, not per statement
+
+# Shared by every caller that imports this module, so repeat setups reuse one
+# control connection and session instead of opening a new Cluster each time.
+_cluster_singleton = None
+_session_singleton = None
+_cluster_lock = threading.Lock()
+
+def build_cluster():
+    """Create a Cluster configured for the setup workload."""
+    profile = ExecutionProfile(
+        load_balancing_policy=TokenAwarePolicy(DCAwareRoundRobinPolicy()),
+        request_timeout=DDL_REQUEST_TIMEOUT,
+        retry_policy=RetryPolicy()
+    )
+    return Cluster(
+        [CASSANDRA_HOST],
+        port=CASSANDRA_PORT,
+        protocol_version=PROTOCOL_VERSION,
+        connect_timeout=CONNECT_TIMEOUT,
+        control_connection_timeout=CONNECT_TIMEOUT,
+        connection_class=ConnectionClass,
+        reconnection_policy=ExponentialReconnectionPolicy(base_delay=1.0, max_delay=60.0),
+        max_schema_agreement_wait=0,
+        execution_profiles={EXEC_PROFILE_DEFAULT: profile}
+    )
+
+def is_retriable(exc):
+    """
+    Decide whether a connect failure may resolve itself on retry.
+    
+    Bad credentials won't fix themselves, so authentication failures (alone or
+    as the reason every host was unavailable) are surfaced immediately.
+    """
+    if isinstance(exc, AuthenticationFailed):
+        return False
+    if isinstance(exc, NoHostAvailable) and exc.errors:
+        return not all(isinstance(inner, AuthenticationFailed) for inner in exc.errors.values())
+    return True
+
+def connect_with_backoff():
+    """
+    Open a new Cluster and session, waiting for Cassandra to be ready.
+    
+    Retries with exponential backoff plus jitter until CONNECT_DEADLINE elapses,
+    so a node that comes up quickly is picked up quickly and parallel workers
+    don't reconnect in lockstep.
+    
+    Returns:
+        Tuple of (cluster, session) for the established connection
+    """
     logger.info("Waiting for Cassandra to be ready...")
     cluster = None
+    deadline = time.monotonic() + CONNECT_DEADLINE
+    attempt = 0
     
-    for i in range(20):  
+    while True:
+        attempt += 1
         try:
-            cluster = Cluster([CASSANDRA_HOST])
+            cluster = build_cluster()
             session = cluster.connect()
             logger.info("Cassandra is ready!")
-            return cluster
+            return cluster, session
         except Exception as e:
-            logger.warning(f"Cassandra not ready yet (attempt {i+1}/20): {str(e)}")
-            time.sleep(5)  
+            # Release the failed attempt's sockets before trying again
+            if cluster:
+                cluster.shutdown()
+                cluster = None
+            if not is_retriable(e):
+                logger.error(f"Cassandra connection failed permanently: {str(e)}")
+                raise
+            delay = min(BACKOFF_CAP, BACKOFF_BASE * (2 ** (attempt - 1))) + random.random() * BACKOFF_JITTER
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            logger.warning(f"Cassandra not ready yet (attempt {attempt}): {str(e)}; retrying in {delay:.2f}s")
+            time.sleep(min(delay, remaining))
     
     logger.error("Failed to connect to Cassandra after multiple attempts.")
     raise Exception("Could not connect to Cassandra")
 
-def create_keyspace(session):
+def wait_for_cassandra():
+    """
+    Return the shared (cluster, session), connecting on first use.
+    
+    Returns:
+        Tuple of (cluster, session) for the established connection
+    """
+    global _cluster_singleton, _session_singleton
+    with _cluster_lock:
+        if _cluster_singleton is None:
+            _cluster_singleton, _session_singleton = connect_with_backoff()
+        return _cluster_singleton, _session_singleton
+
+def shutdown_cluster():
+    """Shut down the shared cluster, if one was opened."""
+    global _cluster_singleton, _session_singleton
+    with _cluster_lock:
+        if _cluster_singleton is not None:
+            _cluster_singleton.shutdown()
+            _cluster_singleton = None
+            _session_singleton = None
+
+atexit.register(shutdown_cluster)
+
+async def execute(session, query, params=None):
+    """
+    Run a statement through execute_async and await its rows.
+    
+    The driver completes the ResponseFuture on its own I/O thread, so the
+    outcome is handed back to the running loop via call_soon_threadsafe.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def set_result(rows):
+        if not future.done():
+            future.set_result(rows)
+
+    def set_exception(exc):
+        if not future.done():
+            future.set_exception(exc)
+
+    response_future = session.execute_async(query, params)
+    response_future.add_callbacks(
+        lambda rows: loop.call_soon_threadsafe(set_result, rows or []),
+        lambda exc: loop.call_soon_threadsafe(set_exception, exc)
+    )
+    return await future
+
+async def replication_factor(session):
+    """
+    Pick the keyspace replication factor.
+    
+    CASSANDRA_REPLICATION_FACTOR wins if set; otherwise use the node count,
+    capped at MAX_REPLICATION_FACTOR, so a single-node dev cluster isn't
+    given replicas it can never place.
+    """
+    if CASSANDRA_REPLICATION_FACTOR:
+        return int(CASSANDRA_REPLICATION_FACTOR)
+
+    peers = await execute(session, "SELECT peer FROM system.peers")
+    return min(MAX_REPLICATION_FACTOR, 1 + len(peers))
+
+async def create_keyspace(session):
     """
     Create the keyspace if it doesn't exist.
+    
+    An existing keyspace is left untouched, skipping the DDL round trip on
+    warm restarts. The existence check and peer count run concurrently.
     """
-    logger.info(f"Creating keyspace {CASSANDRA_KEYSPACE} if it doesn't exist...")
+    existing, rf = await asyncio.gather(
+        execute(
+            session,
+            "SELECT keyspace_name FROM system_schema.keyspaces WHERE keyspace_name = %s",
+            (CASSANDRA_KEYSPACE,)
+        ),
+        replication_factor(session)
+    )
+    if existing:
+        logger.info(f"Keyspace {CASSANDRA_KEYSPACE} already exists, skipping creation.")
+        return
 
-    session.execute(f"""
-    CREATE KEYSPACE IF NOT EXISTS {CASSANDRA_KEYSPACE}
-    WITH REPLICATION = {{
-        'class': 'SimpleStrategy',
-        'replication_factor': 3
-    }}
-    """)
+    logger.info(f"Creating keyspace {CASSANDRA_KEYSPACE} (replication_factor={rf}) if it doesn't exist...")
+
+    await execute(session, ddl_statement(CREATE_KEYSPACE_CQL % rf))
 
+    await wait_for_schema_agreement(session)
     logger.info(f"Keyspace {CASSANDRA_KEYSPACE} is ready.")
 
-def create_tables(session):
+async def wait_for_schema_agreement(session):
     """
-    Create the tables for the application based on our schema design.
+    Wait until every node reports the same schema version.
+    
+    The cluster is built with max_schema_agreement_wait=0 so the driver doesn't
+    wait after each DDL; callers invoke this once per batch of schema changes.
+    The driver's wait blocks, so it runs in a worker thread.
+    """
+    control_connection = session.cluster.control_connection
+    agreed = await asyncio.to_thread(
+        control_connection.wait_for_schema_agreement, wait_time=SCHEMA_AGREEMENT_WAIT
+    )
+    if not agreed:
+        raise Exception("Schema agreement not reached")
+
+def ddl_statement(cql):
     """
+    Wrap a DDL string as an idempotent statement.
+    
+    Every DDL here uses IF NOT EXISTS, so the driver's retry policy may safely
+    re-send it after a transient coordinator failure.
+    """
+    return SimpleStatement(cql, is_idempotent=True)
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema.cql")
+
+def load_cql_script(path):
+    """
+    Split a CQL script into individual statements.
+    
+    Handles -- and // line comments, /* */ block comments, quoted strings
+    containing semicolons, and a missing trailing semicolon.
+    """
+    with open(path) as f:
+        script = f.read()
+
+    statements = []
+    current = []
+    i = 0
+    length = len(script)
+    while i < length:
+        char = script[i]
+        pair = script[i:i + 2]
+        if pair in ("--", "//"):
+            newline = script.find("\n", i)
+            i = length if newline == -1 else newline
+            continue
+        if pair == "/*":
+            close = script.find("*/", i + 2)
+            i = length if close == -1 else close + 2
+            continue
+        if char in ("'", '"'):
+            close = i + 1
+            while close < length:
+                if script[close] == char:
+                    # A doubled quote is an escaped quote inside the literal
+                    if script[close + 1:close + 2] == char:
+                        close += 2
+                        continue
+                    break
+                close += 1
+            current.append(script[i:close + 1])
+            i = close + 1
+            continue
+        if char == ";":
+            statements.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    statements.append("".join(current))
+
+    return [statement.strip() for statement in statements if statement.strip()]
+
+TABLE_NAME_PATTERN = re.compile(r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:\w+\.)?(\w+)", re.IGNORECASE)
+
+async def existing_tables(session):
+    """Return the names of the tables already in the keyspace."""
+    rows = await execute(
+        session,
+        "SELECT table_name FROM system_schema.tables WHERE keyspace_name = %s",
+        (CASSANDRA_KEYSPACE,)
+    )
+    return {row.table_name for row in rows}
+
+async def create_tables(session):
+    """
+    Create the tables for the application from schema.cql.
+    
+    If every table already exists the DDL is skipped entirely, sparing warm
+    restarts the schema round trips. Otherwise the statements are gathered
+    so their round trips overlap, followed by a single schema agreement wait.
+    """
+    statements = load_cql_script(SCHEMA_PATH)
+    wanted = {
+        match.group(1).lower()
+        for match in map(TABLE_NAME_PATTERN.match, statements)
+        if match
+    }
+    if wanted <= await existing_tables(session):
+        logger.info("All tables already exist, skipping creation.")
+        return
+
     logger.info("Creating tables...")
 
-    session.execute("""
-    CREATE TABLE IF NOT EXISTS messages_by_conversation (
-        conversation_id bigint,
-        created_at timestamp,
-        message_id uuid,
-        sender_id bigint,
-        receiver_id bigint,
-        content text,
-        PRIMARY KEY (conversation_id, created_at, message_id)
-    ) WITH CLUSTERING ORDER BY (created_at DESC, message_id DESC);
-    """)
-
-    session.execute("""
-    CREATE TABLE IF NOT EXISTS conversations_by_user (
-        user_id bigint,
-        last_message_at timestamp,
-        conversation_id bigint,
-        other_user_id bigint,
-        last_message_content text,
-        PRIMARY KEY (user_id, last_message_at, conversation_id)
-    ) WITH CLUSTERING ORDER BY (last_message_at DESC, conversation_id DESC);
-    """)
-
-    session.execute("""
-    CREATE TABLE IF NOT EXISTS conversation_metadata (
-        conversation_id bigint,
-        user1_id bigint,
-        user2_id bigint,
-        created_at timestamp,
-        last_message_at timestamp,
-        last_message_content text,
-        PRIMARY KEY (conversation_id)
-    );
-    """)
-
-    session.execute("""
-    CREATE TABLE IF NOT EXISTS user_conversations_lookup (
-        user1_id bigint,
-        user2_id bigint,
-        conversation_id bigint,
-        PRIMARY KEY ((user1_id, user2_id))
-    );
-    """)
+    await asyncio.gather(*(execute(session, ddl_statement(cql)) for cql in statements))
+    await wait_for_schema_agreement(session)
 
     logger.info("Tables created successfully.")
 
-def main():
+async def main():
     """Initialize the database."""
     logger.info("Starting Cassandra initialization...")
 
-    cluster = wait_for_cassandra()
+    # Cluster.connect() and set_keyspace() have no async variants; keep them off the loop
+    _, session = await asyncio.to_thread(wait_for_cassandra)
 
     try:
-        session = cluster.connect()
-
-        create_keyspace(session)
-        session.set_keyspace(CASSANDRA_KEYSPACE)
-        create_tables(session)
+        await create_keyspace(session)
+        await asyncio.to_thread(session.set_keyspace, CASSANDRA_KEYSPACE)
+        await create_tables(session)
 
         logger.info("Cassandra initialization completed successfully.")
     except Exception as e:
         logger.error(f"Error during initialization: {str(e)}")
         raise
     finally:
-        if cluster:
-            cluster.shutdown()
+        shutdown_cluster()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Tests for the ResponseFuture -> asyncio bridge in CassandraClient.
+"""
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from cassandra.cluster import ResponseFuture
+
+from app.db import cassandra_client
+from app.db.cassandra_client import CassandraClient
+
+
+def make_response_future() -> ResponseFuture:
+    """Build a real driver ResponseFuture that is never sent."""
+    return ResponseFuture(MagicMock(), message=None, query=None, timeout=None)
+
+
+async def complete_from_driver_thread(response_future: ResponseFuture, response, paging_state=None):
+    """Await the bridge while a separate thread completes the future, as the driver's I/O thread would."""
+    client = CassandraClient()
+    awaiting = asyncio.ensure_future(client._await_response(response_future))
+    await asyncio.sleep(0)
+
+    def complete():
+        response_future._paging_state = paging_state
+        response_future._set_final_result(response)
+
+    thread = threading.Thread(target=complete)
+    thread.start()
+    try:
+        return await asyncio.wait_for(awaiting, timeout=5)
+    finally:
+        thread.join()
+
+
+def test_void_result_resolves_to_empty_rows():
+    rows, paging_state = asyncio.run(complete_from_driver_thread(make_response_future(), None))
+
+    assert rows == []
+    assert paging_state is None
+
+
+def test_rows_result_carries_paging_state():
+    rows, paging_state = asyncio.run(
+        complete_from_driver_thread(make_response_future(), [("a",), ("b",)], paging_state=b"next")
+    )
+
+    assert rows == [("a",), ("b",)]
+    assert paging_state == b"next"
+
+
+def test_prepare_all_leaves_failed_statements_for_first_use():
+    client = CassandraClient()
+    client.session = MagicMock()
+    client.session.prepare.side_effect = [Exception("unconfigured table messages"), "prepared"]
+
+    client.prepare_all(["SELECT * FROM messages WHERE id = ?", "SELECT * FROM users WHERE id = ?"])
+
+    assert "SELECT * FROM messages WHERE id = ?" not in client._prepared
+    assert client._prepared["SELECT * FROM users WHERE id = ?"] == "prepared"
+
+
+def test_connect_surfaces_cluster_construction_errors(monkeypatch):
+    monkeypatch.setattr(cassandra_client, "Cluster", MagicMock(side_effect=ValueError("bad profile")))
+    client = CassandraClient()
+
+    with pytest.raises(ValueError, match="bad profile"):
+        client.connect(retries=1)
+
+    assert client.cluster is None
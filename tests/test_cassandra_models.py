@@ -0,0 +1,104 @@
+"""
+Tests for the Cassandra models, run against a fake client.
+"""
+import asyncio
+import uuid
+from collections import namedtuple
+from datetime import datetime
+
+import pytest
+
+from app.models.cassandra_models import ConversationModel, MessageModel, conversation_id_for
+from app.schemas.common import MAX_USER_ID
+
+MessageRecord = namedtuple(
+    "MessageRecord", "conversation_id created_at message_id sender_id receiver_id content"
+)
+ConversationRecord = namedtuple(
+    "ConversationRecord", "user_id last_message_at conversation_id other_user_id last_message_content"
+)
+InsertResult = namedtuple("InsertResult", "applied conversation_id user1_id user2_id created_at")
+
+NOW = datetime(2024, 1, 1)
+
+
+class FakeCassandra:
+    """Returns canned rows from execute_page, capped at the requested fetch size."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.fetch_sizes = []
+
+    async def execute_page(self, query, params=None, fetch_size=20, paging_state=None):
+        self.fetch_sizes.append(fetch_size)
+        page = self.rows[:fetch_size]
+        return page, (b"next" if page else None)
+
+
+def message_records(count):
+    return [MessageRecord(7, NOW, uuid.uuid4(), 1, 2, f"message {i}") for i in range(count)]
+
+
+def conversation_records(count):
+    return [ConversationRecord(1, NOW, i, 2, f"message {i}") for i in range(count)]
+
+
+@pytest.mark.parametrize("available, expected_has_more", [(3, False), (4, True)])
+def test_messages_before_timestamp_has_more(available, expected_has_more):
+    cassandra = FakeCassandra(message_records(available))
+
+    messages, has_more = asyncio.run(
+        MessageModel(cassandra).get_messages_before_timestamp(7, NOW, limit=3)
+    )
+
+    assert len(messages) == 3
+    assert has_more is expected_has_more
+    assert cassandra.fetch_sizes == [4]
+
+
+@pytest.mark.parametrize("available, expected_has_more", [(3, False), (4, True)])
+def test_user_conversations_has_more(available, expected_has_more):
+    cassandra = FakeCassandra(conversation_records(available))
+
+    conversations, has_more = asyncio.run(
+        ConversationModel(cassandra).get_user_conversations(1, limit=3)
+    )
+
+    assert len(conversations) == 3
+    assert has_more is expected_has_more
+    assert cassandra.fetch_sizes == [4]
+
+
+def test_conversation_id_is_symmetric():
+    assert conversation_id_for(3, 9) == conversation_id_for(9, 3)
+
+
+@pytest.mark.parametrize("user1_id, user2_id", [(0, 0), (1, 2), (0, MAX_USER_ID), (MAX_USER_ID, MAX_USER_ID)])
+def test_conversation_id_is_non_negative_bigint(user1_id, user2_id):
+    assert 0 <= conversation_id_for(user1_id, user2_id) < 2**63
+
+
+def test_conversation_id_is_stable():
+    # Stored IDs depend on this value; changing the derivation orphans existing conversations
+    assert conversation_id_for(1, 2) == 5702003866966172010
+
+
+class FakeConditionalInsert:
+    """Answers the conversation_metadata insert with a canned LWT result."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def execute_async_await(self, query, params=None):
+        return self.rows
+
+
+def test_create_conversation_keeps_the_first_writers_row():
+    existing = InsertResult(False, 42, 1, 2, datetime(2023, 6, 1))
+
+    conversation = asyncio.run(
+        ConversationModel(FakeConditionalInsert([existing]))._create_conversation(42, 2, 1)
+    )
+
+    assert conversation.participant_ids == [1, 2]
+    assert conversation.created_at == datetime(2023, 6, 1)
@@ -0,0 +1,88 @@
+"""
+Tests for the schema setup script.
+"""
+import pytest
+from cassandra import AuthenticationFailed, OperationTimedOut
+from cassandra.cluster import NoHostAvailable
+
+from scripts import setup_db
+
+
+def load(tmp_path, script):
+    path = tmp_path / "schema.cql"
+    path.write_text(script)
+    return setup_db.load_cql_script(path)
+
+
+def test_splits_on_semicolons(tmp_path):
+    assert load(tmp_path, "CREATE TABLE a (id int PRIMARY KEY);\nCREATE TABLE b (id int PRIMARY KEY);") == [
+        "CREATE TABLE a (id int PRIMARY KEY)",
+        "CREATE TABLE b (id int PRIMARY KEY)",
+    ]
+
+
+def test_strips_double_dash_comments(tmp_path):
+    assert load(tmp_path, "-- header; not a statement\nSELECT 1; -- trailing;\n") == ["SELECT 1"]
+
+
+def test_strips_double_slash_comments(tmp_path):
+    assert load(tmp_path, "// header; not a statement\nSELECT 1; // trailing;\n") == ["SELECT 1"]
+
+
+def test_strips_block_comments(tmp_path):
+    assert load(tmp_path, "/* one;\ntwo; */ SELECT /* inline; */ 1;") == ["SELECT  1"]
+
+
+def test_keeps_semicolons_inside_quotes(tmp_path):
+    assert load(tmp_path, "SELECT 'a;b' FROM t; SELECT \"c;d\" FROM t;") == [
+        "SELECT 'a;b' FROM t",
+        'SELECT "c;d" FROM t',
+    ]
+
+
+def test_keeps_doubled_quote_escapes(tmp_path):
+    assert load(tmp_path, "INSERT INTO t (v) VALUES ('it''s; fine');") == [
+        "INSERT INTO t (v) VALUES ('it''s; fine')",
+    ]
+
+
+def test_comment_markers_inside_quotes_are_literal(tmp_path):
+    assert load(tmp_path, "SELECT '-- not a comment' FROM t;") == ["SELECT '-- not a comment' FROM t"]
+
+
+def test_accepts_missing_trailing_semicolon(tmp_path):
+    assert load(tmp_path, "SELECT 1;\nSELECT 2\n") == ["SELECT 1", "SELECT 2"]
+
+
+def test_schema_file_has_the_three_tables():
+    statements = setup_db.load_cql_script(setup_db.SCHEMA_PATH)
+
+    assert len(statements) == 3
+    assert [setup_db.TABLE_NAME_PATTERN.match(cql).group(1) for cql in statements] == [
+        "messages_by_conversation",
+        "conversations_by_user",
+        "conversation_metadata",
+    ]
+
+
+@pytest.mark.parametrize("exc", [
+    AuthenticationFailed("bad credentials"),
+    NoHostAvailable("Unable to connect", {
+        "10.0.0.1:9042": AuthenticationFailed("bad credentials"),
+        "10.0.0.2:9042": AuthenticationFailed("bad credentials"),
+    }),
+])
+def test_authentication_failures_are_not_retried(exc):
+    assert setup_db.is_retriable(exc) is False
+
+
+@pytest.mark.parametrize("exc", [
+    OperationTimedOut("timed out"),
+    NoHostAvailable("Unable to connect", {"10.0.0.1:9042": ConnectionRefusedError(111, "refused")}),
+    NoHostAvailable("Unable to connect", {
+        "10.0.0.1:9042": AuthenticationFailed("bad credentials"),
+        "10.0.0.2:9042": OperationTimedOut("timed out"),
+    }),
+])
+def test_connection_errors_are_retried(exc):
+    assert setup_db.is_retriable(exc) is True